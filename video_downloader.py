@@ -7,27 +7,247 @@ Combines direct library usage with powerful CLI features
 import sys
 import os
 import argparse
+import hashlib
+import itertools
+import queue
+import re
+import threading
+import time
+from types import MappingProxyType, SimpleNamespace
 from pathlib import Path
-from yt_dlp import YoutubeDL
 
-def check_dependencies():
-    """Check if FFmpeg is available for post-processing"""
+# Serializes progress output from concurrent download workers
+_print_lock = threading.Lock()
+
+# Minimum seconds between progress redraws
+PROGRESS_INTERVAL = 0.1
+_last_progress = 0.0
+
+# Progress lines are only drawn on a terminal; redirected output gets yt-dlp's log lines
+_STDOUT_IS_TTY = os.isatty(1)
+
+# Metadata cache for extract_info results
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "video-downloader"
+CACHE_TTL = 3600
+CACHE_MAX_ENTRIES = 256
+
+# Pause before starting the next playlist entry, raised when the host rate-limits us
+BACKOFF_INITIAL = 2.0
+BACKOFF_MAX = 120.0
+_backoff = 0.0
+_backoff_lock = threading.Lock()
+
+# Output directories already created by this process
+_ensured_dirs = set()
+
+# External downloaders accepted by --accelerator, with the arguments passed to each
+ACCELERATORS = {
+    "aria2c": ["-x", "16", "-s", "16", "-k", "1M", "--file-allocation=none"],
+}
+
+# Upper bound for --jobs and --fragments
+MAX_CONCURRENCY = 32
+
+# yt-dlp format strings keyed by (quality, audio_only); numeric heights use _QUALITY_TMPL
+_FORMAT_MAP = {
+    ("best", False): "bestvideo+bestaudio/best",
+    ("worst", False): "worst",
+    (None, True): "bestaudio/best",
+}
+_QUALITY_TMPL = "bestvideo[height<={q}]+bestaudio/best[height<={q}]".format
+_MODE_LABELS = {"best": "Best quality", "worst": "Lowest quality"}
+
+# Subtitle options, shared read-only by every download
+_SUB_OPTS = MappingProxyType({
+    "writesubtitles": True,
+    "writeautomaticsub": True,
+    "subtitleslangs": ("en",),
+})
+
+# FFmpeg arguments for the MP3 conversion in audio-only mode
+_MP3_ARGS = ("-vn", "-codec:a", "libmp3lame", "-b:a", "192k")
+
+# Row layout for the list command
+_FORMAT_ROW = "{:<10} {:<15} {:<10} {:<15} {:<10}"
+_BYTES_TO_MB = 1 / (1024 * 1024)
+
+def check_dependencies(accelerator=None):
+    """Check if FFmpeg (and the requested download accelerator) is available"""
     import shutil
+    ok = True
     if not shutil.which('ffmpeg'):
         print("⚠️  Warning: FFmpeg is not installed")
         print("   Some features (audio extraction, format conversion) may not work")
         print("   Install: sudo apt install ffmpeg  (or brew install ffmpeg on macOS)")
-        return False
-    return True
+        ok = False
+    if accelerator == 'aria2c' and not shutil.which('aria2c'):
+        print("⚠️  Warning: aria2c is not installed")
+        print("   Downloads will use the built-in downloader instead")
+        print("   Install: sudo apt install aria2  (or brew install aria2 on macOS)")
+        ok = False
+    return ok
+
+class _RateLimitLogger:
+    """yt-dlp logger that prints like the default one and notes HTTP 429/403 responses"""
+    
+    def __init__(self):
+        # Retries log the same response several times; callers read and
+        # reset this once per entry so each entry backs off at most once
+        self.rate_limited = False
+        self.errors = 0
+    
+    def debug(self, msg):
+        # yt-dlp sends both info and debug messages here; debug ones are prefixed
+        if not msg.startswith('[debug] '):
+            self.info(msg)
+    
+    def info(self, msg):
+        self._check_rate_limit(msg)
+        with _print_lock:
+            print(msg)
+    
+    def warning(self, msg):
+        self._check_rate_limit(msg)
+        with _print_lock:
+            print(f"WARNING: {msg}", file=sys.stderr)
+    
+    def error(self, msg):
+        self.errors += 1
+        self._check_rate_limit(msg)
+        with _print_lock:
+            print(msg, file=sys.stderr)
+    
+    def _check_rate_limit(self, msg):
+        if "HTTP Error 429" in msg or "HTTP Error 403" in msg:
+            self.rate_limited = True
+
+def _bump_backoff():
+    """Double the backoff delay after an entry hit an HTTP 429/403 response"""
+    global _backoff
+    with _backoff_lock:
+        _backoff = min(max(_backoff * 2, BACKOFF_INITIAL), BACKOFF_MAX)
+
+def _relax_backoff():
+    """Halve the backoff delay after a successful download"""
+    global _backoff
+    with _backoff_lock:
+        _backoff = _backoff / 2 if _backoff > BACKOFF_INITIAL else 0.0
+
+# orjson is optional; it parses large playlist caches several times faster.
+# Both are imported on first use so runs that skip the cache don't pay for them
+def _dumps(obj):
+    try:
+        import orjson
+    except ImportError:
+        import json
+        return json.dumps(obj).encode()
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+def _loads(data):
+    try:
+        import orjson
+    except ImportError:
+        import json
+        return json.loads(data)
+    return orjson.loads(data)
+
+def _cached_extract(ydl, url, process=True, use_cache=True, refresh=False, ttl=CACHE_TTL,
+                    ie_key=None):
+    """
+    Run ydl.extract_info(url, download=False), caching the result on disk
+    
+    Args:
+        ydl: YoutubeDL instance used on a cache miss
+        url: Video or playlist URL
+        process: Passed through to extract_info (False skips format resolution)
+        use_cache: Read and write the cache at all
+        refresh: Ignore any cached entry and fetch fresh metadata
+        ttl: Maximum age of a cached entry in seconds
+        ie_key: Extractor to use, as given by a url/url_transparent result
+    """
+    if not use_cache:
+        return ydl.extract_info(url, download=False, process=process, ie_key=ie_key)
+    
+    # noplaylist changes what the extractor returns for watch?v=...&list=... URLs
+    no_playlist = bool(ydl.params.get('noplaylist'))
+    key = hashlib.sha1(f"{url}\0{no_playlist}\0{ie_key}".encode()).hexdigest()
+    cache_file = CACHE_DIR / (key + (".json" if process else ".flat.json"))
+    
+    if not refresh:
+        try:
+            if time.time() - cache_file.stat().st_mtime < ttl:
+                with open(cache_file, "rb") as f:
+                    return _loads(f.read())
+        except (OSError, ValueError):
+            pass
+    
+    info = ydl.extract_info(url, download=False, process=process, ie_key=ie_key)
+    if info is None:
+        return None
+    
+    entries = info.get('entries')
+    if entries is None or isinstance(entries, list):
+        # Playlist probes are downloaded from, so only cache url references
+        if process or _only_references(entries):
+            _write_cache(ydl, info, cache_file)
+    else:
+        # Unprocessed playlists hold lazy entries: hand them to the caller
+        # as they arrive and write the cache once they have all been seen
+        info['entries'] = _tee_entries(ydl, info, entries, cache_file)
+    
+    return info
+
+def _tee_entries(ydl, info, entries, cache_file):
+    """Yield lazy playlist entries, caching the playlist when exhausted"""
+    seen = []
+    for entry in entries:
+        seen.append(entry)
+        yield entry
+    if _only_references(seen):
+        _write_cache(ydl, dict(info, entries=seen), cache_file)
+
+def _only_references(entries):
+    """
+    True if every entry is a url/url_transparent reference
+    
+    Some extractors return fully resolved videos in unprocessed playlists;
+    their media URLs may be signed and expire, so those must not be cached
+    for later downloads.
+    """
+    return all(isinstance(entry, dict) and entry.get('_type') in ('url', 'url_transparent')
+               for entry in entries or ())
+
+def _write_cache(ydl, info, cache_file):
+    """Atomically write sanitized info to cache_file"""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(_dumps(ydl.sanitize_info(info)))
+        os.replace(tmp_file, cache_file)
+        _trim_cache()
+    except (OSError, TypeError):
+        pass
+
+def _trim_cache(max_entries=CACHE_MAX_ENTRIES):
+    """Delete all but the newest max_entries cache files"""
+    files = sorted(CACHE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in files[max_entries:]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
 
 def download_video(url, audio_only=False, output_dir="downloads", start=1, 
                    quality="best", format_code=None, subtitle=False, 
-                   no_playlist=False):
+                   no_playlist=False, jobs=4, fragments=8, use_cache=True,
+                   refresh_metadata=False, probe=True, accelerator=None,
+                   batch_file=None, throttled_rate=None):
     """
     Download video(s) with flexible options
     
     Args:
-        url: Video or playlist URL
+        url: Video or playlist URL (ignored when batch_file is given)
         audio_only: Extract audio only (MP3)
         output_dir: Output directory path
         start: Playlist start index (1-based)
@@ -35,79 +255,161 @@ def download_video(url, audio_only=False, output_dir="downloads", start=1,
         format_code: Custom format code for advanced users
         subtitle: Download subtitles
         no_playlist: Download single video even if URL is a playlist
+        jobs: Number of playlist entries to download in parallel
+        fragments: Number of HLS/DASH fragments to fetch concurrently
+        use_cache: Use the on-disk metadata cache
+        refresh_metadata: Refetch metadata even if a cached copy exists
+        probe: Look up video/playlist info before downloading
+        accelerator: External multi-connection downloader (e.g. aria2c)
+        throttled_rate: Re-extract a download that stays below this many KB/s
+        batch_file: Text file with one URL per line (# starts a comment)
     """
+    from yt_dlp import YoutubeDL
+    
+    # Batch mode: every URL goes through the same worker pool in this process
+    if batch_file:
+        try:
+            # utf-8-sig drops the BOM Windows editors put at the start of the file
+            lines = Path(batch_file).read_text(encoding="utf-8-sig").splitlines()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"❌ Error reading batch file: {e}")
+            return False
+        urls = [line.strip() for line in lines
+                if line.strip() and not line.lstrip().startswith('#')]
     
-    # Create output directory
+    # Create output directory (once per process; mkdir is idempotent if this races)
     output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
+    key = os.fspath(output_path)
+    if key not in _ensured_dirs:
+        output_path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(key)
     
     # Base options
     ydl_opts = {
-        "outtmpl": os.path.join(output_dir, "%(title)s.%(ext)s"),
+        "paths": {"home": str(output_path)},
+        "outtmpl": {"default": "%(title)s.%(ext)s"},
         "ignoreerrors": True,
         "playliststart": start,
         "noplaylist": no_playlist,
         "retries": 5,
         "fragment_retries": 5,
+        "logger": _RateLimitLogger(),
+        "noprogress": True,
+        "http_headers": {"Connection": "keep-alive"},
+        "concurrent_fragment_downloads": fragments,
+        "http_chunk_size": 10485760,
         "progress_hooks": [progress_hook],
     }
     
     # Audio extraction
+    # MP3 conversion happens on a separate thread so FFmpeg overlaps the next download
+    transcode_queue = None
     if audio_only:
-        ydl_opts.update({
-            "format": "bestaudio/best",
-            "postprocessors": [{
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }],
-        })
+        transcode_queue = queue.Queue(maxsize=2)
+        ydl_opts["format"] = _FORMAT_MAP[None, True]
+        ydl_opts["post_hooks"] = [transcode_queue.put]
         print("🎵 Mode: Audio only (MP3)")
     
     # Video format selection
     else:
-        if format_code:
-            ydl_opts["format"] = format_code
-            print(f"🎬 Mode: Custom format ({format_code})")
-        elif quality == "best":
-            ydl_opts["format"] = "bestvideo+bestaudio/best"
-            print("🎬 Mode: Best quality")
-        elif quality == "worst":
-            ydl_opts["format"] = "worst"
-            print("🎬 Mode: Lowest quality")
-        else:
-            ydl_opts["format"] = f"bestvideo[height<={quality}]+bestaudio/best[height<={quality}]"
-            print(f"🎬 Mode: Up to {quality}p quality")
+        ydl_opts["format"] = (format_code or _FORMAT_MAP.get((quality, False))
+                              or _QUALITY_TMPL(q=quality))
+        print("🎬 Mode: " + (f"Custom format ({format_code})" if format_code else
+                            _MODE_LABELS.get(quality) or f"Up to {quality}p quality"))
     
     # Subtitle options
     if subtitle:
-        ydl_opts.update({
-            "writesubtitles": True,
-            "writeautomaticsub": True,
-            "subtitleslangs": ["en"],
-        })
+        ydl_opts["writesubtitles"] = _SUB_OPTS["writesubtitles"]
+        ydl_opts["writeautomaticsub"] = _SUB_OPTS["writeautomaticsub"]
+        ydl_opts["subtitleslangs"] = _SUB_OPTS["subtitleslangs"]
         print("📝 Subtitles: Enabled")
     
+    # Opt-in: re-extracting slow downloads costs extra page fetches
+    if throttled_rate:
+        ydl_opts["throttledratelimit"] = throttled_rate * 1024
+    
+    # External multi-connection downloader
+    # (a missing tool is reported once, by check_dependencies)
+    if accelerator:
+        import shutil
+        if accelerator not in ACCELERATORS:
+            print(f"⚠️  Unsupported accelerator: {accelerator}, using the built-in downloader")
+        elif shutil.which(accelerator):
+            ydl_opts["external_downloader"] = {"default": accelerator}
+            ydl_opts["external_downloader_args"] = {accelerator: ACCELERATORS[accelerator]}
+            print(f"🚀 Accelerator: {accelerator}")
+    
     print(f"📁 Output: {output_path.absolute()}")
-    print(f"🔗 URL: {url}\n")
+    if batch_file:
+        print(f"📄 Batch file: {batch_file} ({len(urls)} URLs)\n")
+    else:
+        print(f"🔗 URL: {url}\n")
     
+    transcoder = None
+    transcode_failures = []
     try:
-        with YoutubeDL(ydl_opts) as ydl:
-            # Extract info first to show what we're downloading
-            info = ydl.extract_info(url, download=False)
-            
-            if 'entries' in info:
-                total = len(info['entries'])
-                print(f"📋 Playlist detected: {info.get('title', 'Unknown')} ({total} videos)")
-                if start > 1:
-                    print(f"⏩ Starting from video #{start}\n")
-            else:
-                print(f"📹 Single video: {info.get('title', 'Unknown')}\n")
-            
-            # Download
-            ydl.download([url])
-            print("\n✅ Download completed successfully!")
-            return True
+        if transcode_queue is not None:
+            transcoder = threading.Thread(target=_transcode_worker,
+                                          args=(transcode_queue, transcode_failures),
+                                          daemon=True)
+            transcoder.start()
+        
+        if batch_file:
+            print(f"⚡ Parallel downloads: {jobs}\n")
+            entries = ({"_type": "url", "url": batch_url} for batch_url in urls)
+            failed = _download_parallel(entries, ydl_opts, jobs, len(urls))
+        else:
+            with YoutubeDL(ydl_opts) as ydl:
+                # A single video in a known format needs no probe; yt-dlp
+                # fetches the metadata itself when downloading
+                # ydl.download returns a non-zero retcode if anything failed
+                if not probe or (no_playlist and format_code):
+                    failed = 1 if ydl.download([url]) else 0
+                else:
+                    # Extract info first to show what we're downloading
+                    info = _cached_extract(ydl, url, process=False, use_cache=use_cache,
+                                           refresh=refresh_metadata)
+                    
+                    # Unprocessed results may only point elsewhere (playlist
+                    # redirects, bare playlist IDs); follow them before deciding
+                    while info is not None and info.get('_type') in ('url', 'url_transparent'):
+                        info = _cached_extract(ydl, info['url'], process=False,
+                                               use_cache=use_cache, refresh=refresh_metadata,
+                                               ie_key=info.get('ie_key'))
+                    
+                    if info is None:
+                        print("\n❌ Error: Could not extract video information")
+                        return False
+                    
+                    if info.get('_type') != 'playlist':
+                        print(f"📹 Single video: {info.get('title', 'Unknown')}\n")
+                        failed = 1 if ydl.download([url]) else 0
+                    else:
+                        # Entries may be a lazy generator; pull them only as workers free up
+                        entries = info.get('entries') or ()
+                        total = len(entries) if isinstance(entries, list) else "?"
+                        print(f"📋 Playlist detected: {info.get('title', 'Unknown')}")
+                        if start > 1:
+                            print(f"⏩ Starting from video #{start}")
+                            entries = itertools.islice(entries, start - 1, None)
+                            if total != "?":
+                                total = max(total - start + 1, 0)
+                        print(f"⚡ Parallel downloads: {jobs}\n")
+                        
+                        failed = _download_parallel(entries, ydl_opts, jobs, total)
+        
+        if transcoder is not None:
+            # Wait for queued MP3 conversions so the result covers them too
+            transcode_queue.put(None)
+            transcoder.join()
+            transcoder = None
+            failed += len(transcode_failures)
+        
+        if failed:
+            print(f"\n⚠️  Completed with {failed} failed download(s)/conversion(s)")
+            return False
+        print("\n✅ Download completed successfully!")
+        return True
             
     except KeyboardInterrupt:
         print("\n\n⚠️  Download cancelled by user")
@@ -115,19 +417,182 @@ def download_video(url, audio_only=False, output_dir="downloads", start=1,
     except Exception as e:
         print(f"\n❌ Error: {e}")
         return False
+    finally:
+        # Early exits still stop the transcoder
+        if transcoder is not None:
+            # Sentinel tells the transcoder to exit once the queue is drained
+            transcode_queue.put(None)
+            transcoder.join()
+
+def _download_parallel(entries, ydl_opts, jobs, total="?"):
+    """
+    Download entries on a pool of `jobs` worker threads
+    
+    Entries are pulled from the iterable only as workers free up, so lazy
+    playlists start downloading immediately. Returns the number of failures.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    
+    # Each worker thread keeps one YoutubeDL so its HTTP connections
+    # are reused across entries
+    completed = failed = 0
+    workers = threading.local()
+    worker_ydls = []
+    cancelled = threading.Event()
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="worker",
+                            initializer=_init_worker,
+                            initargs=(workers, ydl_opts, worker_ydls, cancelled)) as executor:
+        pending = set()
+        entries = iter(entries)
+        try:
+            while True:
+                # Top up to `jobs` in-flight downloads, pulling entries lazily
+                for entry in itertools.islice(entries, jobs - len(pending)):
+                    if _backoff:
+                        time.sleep(_backoff)
+                    pending.add(executor.submit(_download_entry, entry, workers))
+                if not pending:
+                    break
+                
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    completed += 1
+                    try:
+                        # _download_entry reports failed entries as None
+                        info, rate_limited = future.result()
+                        if rate_limited:
+                            _bump_backoff()
+                        if info is None:
+                            failed += 1
+                        elif not rate_limited:
+                            _relax_backoff()
+                    except Exception as e:
+                        failed += 1
+                        with _print_lock:
+                            print(f"\n❌ Error: {e}")
+                    with _print_lock:
+                        print(f"\r📥 Downloaded {completed}/{total}             ")
+        except KeyboardInterrupt:
+            # Stop pulling entries and make running downloads abort at their
+            # next progress update, so shutdown() below returns promptly
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown()
+            for worker_ydl in worker_ydls:
+                worker_ydl.close()
+    
+    return failed
+
+def _transcode_worker(files, failures):
+    """Convert downloaded files to MP3 as they arrive, appending failed paths to failures"""
+    import subprocess
+    
+    while True:
+        path = files.get()
+        if path is None:
+            break
+        
+        out = os.path.splitext(path)[0] + ".mp3"
+        if out == path:
+            continue
+        
+        try:
+            proc = subprocess.Popen(
+                ["ffmpeg", "-y", "-loglevel", "error", "-i", path, *_MP3_ARGS, out],
+                stdin=subprocess.DEVNULL,
+            )
+            returncode = proc.wait()
+        except OSError as e:
+            failures.append(path)
+            with _print_lock:
+                print(f"\n❌ Error converting {os.path.basename(path)}: {e}")
+            continue
+        
+        if returncode != 0:
+            failures.append(path)
+            with _print_lock:
+                print(f"\n❌ FFmpeg failed on {os.path.basename(path)} (exit code {returncode})")
+            continue
+        
+        try:
+            os.unlink(path)
+        except OSError as e:
+            failures.append(path)
+            with _print_lock:
+                print(f"\n❌ Error removing {os.path.basename(path)}: {e}")
+            continue
+        
+        with _print_lock:
+            print(f"\r🎵 Converted: {os.path.basename(out)}             ")
+
+def _init_worker(workers, ydl_opts, worker_ydls, cancelled):
+    """Give a new pool thread its own YoutubeDL (yt-dlp state is not thread-safe)"""
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadCancelled
+    
+    worker = threading.current_thread().name.rsplit('_', 1)[-1]
+    
+    def worker_progress_hook(d):
+        # Worker threads never see KeyboardInterrupt; abort via the hook instead
+        if cancelled.is_set():
+            raise DownloadCancelled("Download cancelled by user")
+        progress_hook(d, worker)
+    
+    workers.logger = _RateLimitLogger()
+    opts = dict(ydl_opts, progress_hooks=[worker_progress_hook], logger=workers.logger)
+    workers.ydl = YoutubeDL(opts)
+    worker_ydls.append(workers.ydl)
 
-def progress_hook(d):
-    """Custom progress display"""
-    if d['status'] == 'downloading':
-        percent = d.get('_percent_str', 'N/A')
-        speed = d.get('_speed_str', 'N/A')
-        eta = d.get('_eta_str', 'N/A')
-        print(f"\r⬇️  {percent} at {speed} (ETA: {eta})   ", end='', flush=True)
-    elif d['status'] == 'finished':
-        print("\r✓ Download finished, processing...             ", flush=True)
-
-def list_formats(url):
+def _download_entry(entry, workers):
+    """
+    Download a single playlist entry in a worker thread
+    
+    Returns the entry's info dict (None if extraction or download failed)
+    and whether it was rate limited along the way.
+    """
+    logger = workers.logger
+    # With ignoreerrors, failed downloads still return info and only show
+    # up as ERROR lines; each worker handles one entry at a time, so its
+    # logger's counters can be reset per entry
+    logger.rate_limited = False
+    logger.errors = 0
+    info = workers.ydl.process_ie_result(entry, download=True)
+    return (None if logger.errors else info), logger.rate_limited
+
+def progress_hook(d, worker=None):
+    """Custom progress display, redrawn at most every PROGRESS_INTERVAL seconds"""
+    global _last_progress
+    if not _STDOUT_IS_TTY:
+        return
+    status = d['status']
+    if status == 'downloading':
+        now = time.monotonic()
+        if now - _last_progress < PROGRESS_INTERVAL:
+            return
+        _last_progress = now
+        g = d.get
+        line = "\r⬇️  %s%s at %s (ETA: %s)   " % (
+            f"[{worker}] " if worker is not None else "",
+            g('_percent_str', 'N/A'), g('_speed_str', 'N/A'), g('_eta_str', 'N/A'))
+    elif status == 'finished':
+        _last_progress = 0.0
+        line = "\r✓ %sDownload finished, processing...             \n" % (
+            f"[{worker}] " if worker is not None else "")
+    else:
+        return
+    
+    # os.write skips the text layer and releases the GIL during the syscall.
+    # stdout is line-buffered on a terminal, so no print() output is pending.
+    with _print_lock:
+        os.write(1, line.encode())
+
+def list_formats(url, use_cache=True, refresh_metadata=False):
     """List all available formats for a video"""
+    from yt_dlp import YoutubeDL
+    
     print(f"📋 Available formats for: {url}\n")
     
     ydl_opts = {
@@ -137,25 +602,35 @@ def list_formats(url):
     
     try:
         with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+            info = _cached_extract(ydl, url, use_cache=use_cache,
+                                   refresh=refresh_metadata)
             
             if 'formats' in info:
-                print("\n{:<10} {:<15} {:<10} {:<15} {:<10}".format(
+                print("\n" + _FORMAT_ROW.format(
                     "FORMAT", "EXTENSION", "RESOLUTION", "FILESIZE", "NOTE"
                 ))
                 print("-" * 70)
                 
+                # Build the whole table first and write it in one go
+                fmt_row = _FORMAT_ROW.format
+                rows = []
+                append = rows.append
                 for f in info['formats']:
-                    format_id = f.get('format_id', 'N/A')
-                    ext = f.get('ext', 'N/A')
-                    resolution = f.get('resolution', 'audio only' if f.get('vcodec') == 'none' else 'N/A')
-                    filesize = f.get('filesize_approx', f.get('filesize', 0))
-                    filesize_str = f"{filesize / 1024 / 1024:.1f}MB" if filesize else "N/A"
-                    note = f.get('format_note', '')
-                    
-                    print("{:<10} {:<15} {:<10} {:<15} {:<10}".format(
-                        format_id, ext, resolution, filesize_str, note
+                    get = f.get
+                    # yt-dlp may store None, so only compute the fallback when needed
+                    resolution = get('resolution')
+                    if resolution is None:
+                        resolution = 'audio only' if get('vcodec') == 'none' else 'N/A'
+                    filesize = get('filesize_approx') or get('filesize')
+                    append(fmt_row(
+                        get('format_id', 'N/A'),
+                        get('ext', 'N/A'),
+                        resolution,
+                        f"{filesize * _BYTES_TO_MB:.1f}MB" if filesize else "N/A",
+                        get('format_note') or '',
                     ))
+                sys.stdout.write("\n".join(rows))
+                sys.stdout.write("\n")
                 
                 print("\n💡 Use -f FORMAT_ID to download a specific format")
                 print("   Example: python script.py download URL -f 137+140")
@@ -165,7 +640,102 @@ def list_formats(url):
     except Exception as e:
         print(f"❌ Error listing formats: {e}")
 
-def main():
+# Default option values, shared by argparse and the fast-path parser
+_DEFAULTS = {
+    "output": "downloads",
+    "quality": "best",
+    "audio": False,
+    "format": None,
+    "subtitle": False,
+    "start": 1,
+    "no_playlist": False,
+    "jobs": 4,
+    "fragments": 8,
+    "quiet_probe": False,
+    "refresh_metadata": False,
+    "no_cache": False,
+    "accelerator": None,
+    "batch_file": None,
+    "throttled_rate": None,
+}
+
+def _accelerator(value):
+    """Validate an --accelerator value for the fast-path parser"""
+    if value not in ACCELERATORS:
+        raise ValueError(f"unknown accelerator: {value}")
+    return value
+
+# Options understood by the fast-path parser: flag -> (dest, type), type None for switches
+_FAST_OPTIONS = {
+    "-o": ("output", str), "--output": ("output", str),
+    "-q": ("quality", str), "--quality": ("quality", str),
+    "-a": ("audio", None), "--audio": ("audio", None),
+    "-f": ("format", str), "--format": ("format", str),
+    "-s": ("subtitle", None), "--subtitle": ("subtitle", None),
+    "--start": ("start", int),
+    "--no-playlist": ("no_playlist", None),
+    "-j": ("jobs", int), "--jobs": ("jobs", int),
+    "--fragments": ("fragments", int),
+    "--quiet-probe": ("quiet_probe", None),
+    "--refresh-metadata": ("refresh_metadata", None),
+    "--no-cache": ("no_cache", None),
+    "--accelerator": ("accelerator", _accelerator),
+    "--throttled-rate": ("throttled_rate", int),
+}
+
+# argparse's own test for negative numbers that may follow an option
+_NEGATIVE_NUMBER = re.compile(r'^-\d+$|^-\d*\.\d+$')
+
+def _is_number(value):
+    """True for tokens like "-5" that argparse accepts as option values"""
+    return _NEGATIVE_NUMBER.match(value) is not None
+
+def _fast_parse(argv):
+    """
+    Parse the common `download|list URL [options]` form without argparse
+    
+    Returns a namespace with the same attributes argparse would produce, or
+    None for anything unusual (help, unknown or abbreviated options, bad
+    values) so the caller can fall back to argparse and its error messages.
+    """
+    if len(argv) < 2 or argv[0] not in ("download", "list"):
+        return None
+    
+    args = dict(_DEFAULTS, command=argv[0], url=None)
+    tokens = iter(argv[1:])
+    for token in tokens:
+        if not token.startswith("-"):
+            if args["url"] is not None:
+                return None
+            args["url"] = token
+            continue
+        
+        flag, has_value, value = token.partition("=")
+        if flag not in _FAST_OPTIONS:
+            return None
+        dest, kind = _FAST_OPTIONS[flag]
+        if kind is None:
+            if has_value:
+                return None
+            args[dest] = True
+            continue
+        
+        if not has_value:
+            value = next(tokens, None)
+            if value is None or (value.startswith("-") and not _is_number(value)):
+                # argparse treats "-x" here as another option, not a value
+                return None
+        try:
+            args[dest] = kind(value)
+        except ValueError:
+            return None
+    
+    if args["url"] is None:
+        return None
+    return SimpleNamespace(**args)
+
+def _build_parser():
+    """Full argparse parser, used for help and anything _fast_parse rejects"""
     parser = argparse.ArgumentParser(
         description='Download videos from YouTube, Facebook, and 1000+ other sites',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -179,15 +749,19 @@ Examples:
   %(prog)s list "VIDEO_URL"
   %(prog)s download "VIDEO_URL" -f "137+140"
   %(prog)s download "VIDEO_URL" --no-playlist
+  %(prog)s download --batch-file urls.txt
         """
     )
     
     parser.add_argument('command', choices=['download', 'list'],
                        help='Command: download video or list available formats')
-    parser.add_argument('url', help='Video or playlist URL')
-    parser.add_argument('-o', '--output', default='downloads',
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('url', nargs='?', help='Video or playlist URL')
+    source.add_argument('-b', '--batch-file', metavar='FILE',
+                        help='Download every URL listed in FILE (one per line, # for comments)')
+    parser.add_argument('-o', '--output', default=_DEFAULTS['output'],
                        help='Output directory (default: downloads)')
-    parser.add_argument('-q', '--quality', default='best',
+    parser.add_argument('-q', '--quality', default=_DEFAULTS['quality'],
                        help='Video quality: best, worst, or height (720, 1080, etc.)')
     parser.add_argument('-a', '--audio', action='store_true',
                        help='Download audio only (MP3 format)')
@@ -195,19 +769,43 @@ Examples:
                        help='Specific format code (use "list" command to see options)')
     parser.add_argument('-s', '--subtitle', action='store_true',
                        help='Download subtitles')
-    parser.add_argument('--start', type=int, default=1,
+    parser.add_argument('--start', type=int, default=_DEFAULTS['start'],
                        help='Playlist start index (default: 1)')
     parser.add_argument('--no-playlist', action='store_true',
                        help='Download only the video, not the playlist')
-    
-    args = parser.parse_args()
+    parser.add_argument('-j', '--jobs', type=int, default=_DEFAULTS['jobs'],
+                       help='Number of playlist videos to download in parallel (default: 4)')
+    parser.add_argument('--fragments', type=int, default=_DEFAULTS['fragments'],
+                       help='Number of HLS/DASH fragments to download in parallel (default: 8)')
+    parser.add_argument('--quiet-probe', action='store_true',
+                       help='Skip the info lookup before downloading (playlists download one at a time)')
+    parser.add_argument('--refresh-metadata', action='store_true',
+                       help='Ignore cached video information and fetch it again')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Do not read or write the video information cache')
+    parser.add_argument('--throttled-rate', type=int, metavar='KBPS',
+                       help='Restart a download whose speed stays below KBPS KB/s (default: off)')
+    parser.add_argument('--accelerator', choices=sorted(ACCELERATORS),
+                       help='Use an external multi-connection downloader (e.g. aria2c)')
+    return parser
+
+def main():
+    # Plain `download|list URL [options]` invocations skip building the argparse parser
+    args = _fast_parse(sys.argv[1:])
+    if args is None:
+        parser = _build_parser()
+        args = parser.parse_args()
+        if args.url is None and (args.command == 'list' or not args.batch_file):
+            parser.error("a URL is required" if args.command == 'list' else
+                         "a URL or --batch-file is required")
     
     # Check dependencies
-    check_dependencies()
+    check_dependencies(accelerator=args.accelerator)
     print()
     
     if args.command == 'list':
-        list_formats(args.url)
+        list_formats(args.url, use_cache=not args.no_cache,
+                     refresh_metadata=args.refresh_metadata)
     elif args.command == 'download':
         download_video(
             url=args.url,
@@ -217,10 +815,18 @@ Examples:
             quality=args.quality,
             format_code=args.format,
             subtitle=args.subtitle,
-            no_playlist=args.no_playlist
+            no_playlist=args.no_playlist,
+            jobs=min(max(1, args.jobs), MAX_CONCURRENCY),
+            fragments=min(max(1, args.fragments), MAX_CONCURRENCY),
+            use_cache=not args.no_cache,
+            refresh_metadata=args.refresh_metadata,
+            probe=not args.quiet_probe,
+            accelerator=args.accelerator,
+            batch_file=args.batch_file,
+            throttled_rate=args.throttled_rate
         )
     else:
-        parser.print_help()
+        _build_parser().print_help()
 
 if __name__ == "__main__":
     main()